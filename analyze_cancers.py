@@ -70,6 +70,11 @@ CANCER_MAPPING = {
     '間質細胞瘤': '間質細胞瘤', '肋膜間質': '間質細胞瘤'
 }
 
+# Keywords grouped by standard type, so a group stops probing once one synonym hits
+GROUPED_KEYWORDS = {}
+for _keyword, _standard_type in CANCER_MAPPING.items():
+    GROUPED_KEYWORDS.setdefault(_standard_type, []).append(_keyword)
+
 def analyze_document(file_path):
     if not os.path.exists(file_path):
         print(f"錯誤：找不到檔案 '{file_path}'")
@@ -150,9 +155,11 @@ def analyze_document(file_path):
             
             # Find existing cancer matches
             matched_cancers = set()
-            for keyword, standard_type in CANCER_MAPPING.items():
-                if keyword in full_rule_text:
-                    matched_cancers.add(standard_type)
+            for standard_type, keywords in GROUPED_KEYWORDS.items():
+                for keyword in keywords:
+                    if full_rule_text.find(keyword) != -1:
+                        matched_cancers.add(standard_type)
+                        break
             
             # Find potential new cancer keywords using regex
             potential_cancers = set(cancer_regex.findall(full_rule_text))
@@ -1,5 +1,5 @@
 import streamlit as st
-import json
+import orjson
 import os
 import re
 import converter  # Import the converter module
@@ -91,19 +91,67 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Level 1 rule number, optionally wrapped in the converter's bold markers
+_RULE_NUMBER_RE = re.compile(r'^\**(\d+)\.')
+# Paragraph break in stored regulation text; tolerates runs of blank lines
+_PARA_SPLIT = re.compile(r'\n{2,}')
+
+def split_paragraphs(text):
+    """Splits regulation text into stripped, non-empty paragraphs."""
+    return [p for p in (s.strip() for s in _PARA_SPLIT.split(text)) if p]
+
+def find_latest_updates(data):
+    """
+    Returns the entries of the most recent update date, one per (drug, cancer) pair,
+    as (score, latest_date, drug_name, cancer_type, regulation) tuples in data order.
+    """
+    updates = []
+    for item in data:
+        if item.get('latest_date'):
+            dates_parts = item['latest_date'].split('/')
+            if len(dates_parts) == 3:
+                try:
+                    score = int(dates_parts[0]) * 10000 + int(dates_parts[1]) * 100 + int(dates_parts[2])
+                    updates.append((score, item['latest_date'], item['drug_name'], item['cancer_type'], item.get('regulation', '')))
+                except ValueError:
+                    pass
+    if not updates:
+        return ()
+
+    # Only the absolute latest batch is shown, so a max() pass replaces sorting everything
+    max_score = max(u[0] for u in updates)
+    # First entry wins per (drug, cancer); dicts keep insertion order
+    top_updates = {}
+    for upd in updates:
+        if upd[0] == max_score:
+            top_updates.setdefault((upd[2], upd[3]), upd)
+    return tuple(top_updates.values())
+
 @st.cache_data
 def load_data():
-    """Loads the NHI data from the JSON file."""
+    """
+    Loads the NHI data from the JSON file and indexes it once per cache lifetime.
+    Returns (all_drugs, all_drugs_lower, entries_by_drug, top_updates), or None if the file is missing.
+    """
     file_path = 'nhi_data.json'
     if not os.path.exists(file_path):
         return None
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(file_path, 'rb') as f:
+        data = orjson.loads(f.read())
+
+    # Group entries per drug so a selection is a dict lookup instead of a full scan
+    entries_by_drug = {}
+    for item in data:
+        entries_by_drug.setdefault(item['drug_name'], []).append(item)
+    all_drugs = tuple(sorted(entries_by_drug))
+    # Lowercased once here so the search filter doesn't re-lowercase every name per keystroke
+    all_drugs_lower = tuple(drug.lower() for drug in all_drugs)
+    return all_drugs, all_drugs_lower, entries_by_drug, find_latest_updates(data)
 
 def get_concise_regulation(regulation_text, latest_date):
     if not regulation_text:
         return ""
-    paragraphs = [p.strip() for p in regulation_text.split('\n\n') if p.strip()]
+    paragraphs = split_paragraphs(regulation_text)
     matching_paras = [p for p in paragraphs if latest_date in p]
     if matching_paras:
         return "\n\n".join(matching_paras)
@@ -128,44 +176,14 @@ def main():
     """, unsafe_allow_html=True)
 
     # Load data
-    data = load_data()
+    loaded = load_data()
     
-    if data is None:
+    if loaded is None:
         st.error("Error: `nhi_data.json` not found. Please ensure the data file is in the same directory.")
         st.stop()
+    all_drugs, all_drugs_lower, entries_by_drug, top_updates = loaded
 
     # -- What's New section --
-    # Extract entries with latest_date
-    updates = []
-    for item in data:
-        if item.get('latest_date'):
-            dates_parts = item['latest_date'].split('/')
-            if len(dates_parts) == 3:
-                try:
-                    score = int(dates_parts[0]) * 10000 + int(dates_parts[1]) * 100 + int(dates_parts[2])
-                    updates.append((score, item['latest_date'], item['drug_name'], item['cancer_type'], item.get('regulation', '')))
-                except ValueError:
-                    pass
-    
-    # Sort updates by score descending
-    updates.sort(key=lambda x: x[0], reverse=True)
-    
-    # Filter to only keep the absolute latest batch of updates
-    if updates:
-        max_score = updates[0][0]
-        latest_updates = [u for u in updates if u[0] == max_score]
-    else:
-        latest_updates = []
-    
-    # Get unique updates (by drug and cancer) for the latest batch
-    top_updates = []
-    seen = set()
-    for upd in latest_updates:
-        identifier = f"{upd[2]} - {upd[3]}"
-        if identifier not in seen:
-            seen.add(identifier)
-            top_updates.append(upd)
-                
     latest_update_date = None
     if top_updates:
         latest_update_date = top_updates[0][1]
@@ -200,16 +218,25 @@ def main():
     # -- Drug Selection section --
     st.markdown('<div class="section-title">🔍 藥物搜尋與選擇</div>', unsafe_allow_html=True)
     
-    # Extract unique drug names
-    all_drugs = sorted(list(set(item['drug_name'] for item in data)))
-    
     # Two columns for search and selectbox side-by-side
     col1, col2 = st.columns([1, 2])
     with col1:
         search_term = st.text_input("輸入關鍵字搜尋藥名", placeholder="例：Docetaxel...", label_visibility="collapsed")
     with col2:
         if search_term:
-            filtered_drugs = [drug for drug in all_drugs if search_term.lower() in drug.lower()]
+            search_term_lower = search_term.lower()
+            # A name containing the new term also contains any substring of it,
+            # so when the user keeps typing only the previous hits need rechecking.
+            # session_state outlives the load_data cache, so the saved indices are
+            # only reused while they still point into the same drug list.
+            prev_drugs, prev_term, prev_indices = st.session_state.get('search_cache', (None, '', None))
+            if prev_drugs == all_drugs and prev_term in search_term_lower:
+                candidate_indices = prev_indices
+            else:
+                candidate_indices = range(len(all_drugs))
+            matched_indices = [i for i in candidate_indices if search_term_lower in all_drugs_lower[i]]
+            st.session_state['search_cache'] = (all_drugs, search_term_lower, matched_indices)
+            filtered_drugs = [all_drugs[i] for i in matched_indices]
         else:
             filtered_drugs = all_drugs
 
@@ -229,7 +256,7 @@ def main():
         st.markdown(f'<div class="section-title">📋 {selected_drug} - 給付規定詳情</div>', unsafe_allow_html=True)
         
         # Get all matching regulations for this drug
-        matching_items = [item for item in data if item['drug_name'] == selected_drug]
+        matching_items = entries_by_drug.get(selected_drug, [])
         
         # Parse all entries into level 1 rules
         all_rules = []
@@ -238,10 +265,10 @@ def main():
             cancer_type = entry.get('cancer_type', '')
             latest_date = entry.get('latest_date', None)
             
-            paragraphs = [p.strip() for p in regulation.split('\n\n') if p.strip()]
+            paragraphs = split_paragraphs(regulation)
             
             # Check if any paragraph starts with a number. If none, treat the whole thing as one rule.
-            has_numbered_rule = any(re.match(r'^\**\d+\.', p) for p in paragraphs)
+            has_numbered_rule = any(_RULE_NUMBER_RE.match(p) for p in paragraphs)
             
             if not has_numbered_rule:
                 all_rules.append({
@@ -255,7 +282,7 @@ def main():
                 
             current_rule = None
             for p in paragraphs:
-                match = re.match(r'^\**(\d+)\.', p)
+                match = _RULE_NUMBER_RE.match(p)
                 if match:
                     num = int(match.group(1))
                     num_str = f"{num}."
@@ -1,10 +1,21 @@
+import ahocorasick
 import docx
-import json
+from docx.oxml.ns import qn
+import hashlib
+import orjson
 import re
 import os
+import shutil
+import sys
+import tempfile
+from types import MappingProxyType
+
+# Converted outputs keyed by content hash, so an unchanged DOCX skips parsing
+CACHE_DIR = 'cache'
 
 # === Cancer Synonym Mapping ===
-CANCER_MAPPING = {
+# Read-only: built once at import and shared by the keyword automaton below
+CANCER_MAPPING = MappingProxyType({
     # === 肺癌大一統 (全部歸類為 '肺癌') ===
     '非鱗狀非小細胞肺癌': '肺癌',
     '非小細胞肺癌': '肺癌',
@@ -60,7 +71,56 @@ CANCER_MAPPING = {
     '食道癌': '食道癌', '食道鱗狀細胞癌': '食道癌',
     '腦瘤': '腦瘤', '神經膠母細胞瘤': '腦瘤', '星狀細胞瘤': '腦瘤', '寡樹突膠質細胞瘤': '腦瘤',
     '間質細胞瘤': '間質細胞瘤', '肋膜間質': '間質細胞瘤'
+})
+
+# === Keyword Automaton ===
+# Built once at import so each rule block is scanned for every keyword in a single pass.
+CANCER_AUTOMATON = ahocorasick.Automaton()
+for _keyword, _standard_type in CANCER_MAPPING.items():
+    CANCER_AUTOMATON.add_word(_keyword, sys.intern(_standard_type))
+CANCER_AUTOMATON.make_automaton()
+
+# === Precompiled Patterns ===
+_DRUG_RE = re.compile(r'^9\.\d+')
+# Hierarchy levels: 1. / (1) / I. / i. -- a line's first character picks the one pattern to confirm
+_FIRST_CHAR_LEVEL = {'(': 2, 'I': 3, 'V': 3, 'X': 3, 'i': 4, 'v': 4, 'x': 4}
+_LEVEL_PATTERNS = {
+    1: re.compile(r'\d+\.'),
+    2: re.compile(r'\(\d+\)'),
+    3: re.compile(r'[IVX]+\.'),
+    4: re.compile(r'[ivx]+\.'),
 }
+# Markdown per marked level: (quote prefix inherited by following plain lines, line prefix, line suffix)
+_LINE_STYLE = {
+    1: ("", "**", "**"),
+    2: ("> ", "> ", ""),
+    3: (">> ", ">> ", ""),
+    4: (">>> ", ">>> ", ""),
+}
+_SPLIT_COLON = re.compile(r'[:：]')
+_DATE_RE = re.compile(r'(\d{2,3})/(\d{1,2})/(\d{1,2})')
+
+def _line_level(text):
+    """Returns the hierarchy level (1-4) marked at the start of a non-empty line, or 0 for plain text."""
+    head = text[0]
+    # Decimal digits (what \d matches) fall through to level 1; other lines never reach a regex
+    level = _FIRST_CHAR_LEVEL.get(head, 1 if head.isdecimal() else 0)
+    if level and _LEVEL_PATTERNS[level].match(text):
+        return level
+    return 0
+
+def iter_lines(doc):
+    """
+    Yields the stripped, non-empty lines of the document body in order.
+    Walks the body's <w:p> elements directly instead of building doc.paragraphs,
+    and splits each paragraph on internal soft newlines. Lines are interned so
+    boilerplate repeated across drugs is stored once.
+    """
+    for p_elem in doc.element.body.iterchildren(qn('w:p')):
+        for line in p_elem.text.split('\n'):
+            line_str = line.strip()
+            if line_str:
+                yield sys.intern(line_str)
 
 def parse_docx(file_path):
     """
@@ -78,30 +138,14 @@ def parse_docx(file_path):
         print(f"Error reading DOCX file: {e}")
         return []
 
-    drug_pattern = re.compile(r'^9\.\d+')
-    
-    level_1_pattern = re.compile(r'^\d+\.')
-    level_2_pattern = re.compile(r'^\(\d+\)')
-    level_3_pattern = re.compile(r'^[IVX]+\.')
-    level_4_pattern = re.compile(r'^[ivx]+\.')
-
     parsed_data = []
     
     # Step 1: Segment paragraphs into separate drugs
     drugs_raw = []
     current_drug = None
     
-    # Flatten paragraphs by splitting any internal soft newlines
-    flat_paragraphs = []
-    for para in doc.paragraphs:
-        lines = para.text.split('\n')
-        for line in lines:
-            line_str = line.strip()
-            if line_str:
-                flat_paragraphs.append(line_str)
-                
-    for text in flat_paragraphs:
-        if drug_pattern.match(text):
+    for text in iter_lines(doc):
+        if text[:2] == '9.' and _DRUG_RE.match(text):
             if current_drug:
                 drugs_raw.append(current_drug)
             current_drug = {
@@ -117,84 +161,67 @@ def parse_docx(file_path):
         
     # Step 2: Parse rules for each drug
     for drug in drugs_raw:
-        header_text = drug['header']
-        clean_name = re.split(r'[:：]', header_text)[0].strip()
+        parsed_data.extend(parse_drug(drug))
         
-        rules = []
-        current_rule = None
-        current_visual_prefix = ""
-        
-        for text in drug['paragraphs']:
-            if level_1_pattern.match(text):
-                formatted_text = f"**{text}**"
-                current_visual_prefix = ""
-                if current_rule:
-                    rules.append(current_rule)
-                current_rule = {
-                    'paragraphs': [formatted_text],
-                    'raw_paragraphs': [text]
-                }
-            elif level_2_pattern.match(text):
-                current_visual_prefix = "> "
-                formatted_text = f"> {text}"
-                if current_rule is None:
-                    current_rule = {'paragraphs': [], 'raw_paragraphs': []}
-                current_rule['paragraphs'].append(formatted_text)
-                current_rule['raw_paragraphs'].append(text)
-            elif level_3_pattern.match(text):
-                current_visual_prefix = ">> "
-                formatted_text = f">> {text}"
-                if current_rule is None:
-                    current_rule = {'paragraphs': [], 'raw_paragraphs': []}
-                current_rule['paragraphs'].append(formatted_text)
-                current_rule['raw_paragraphs'].append(text)
-            elif level_4_pattern.match(text):
-                current_visual_prefix = ">>> "
-                formatted_text = f">>> {text}"
-                if current_rule is None:
-                    current_rule = {'paragraphs': [], 'raw_paragraphs': []}
-                current_rule['paragraphs'].append(formatted_text)
-                current_rule['raw_paragraphs'].append(text)
-            else:
-                if current_visual_prefix:
-                    formatted_text = f"{current_visual_prefix}{text}"
-                else:
-                    formatted_text = text
-                if current_rule is None:
-                    current_rule = {'paragraphs': [], 'raw_paragraphs': []}
-                current_rule['paragraphs'].append(formatted_text)
-                current_rule['raw_paragraphs'].append(text)
-                
-        if current_rule:
-            rules.append(current_rule)
-            
-        # Step 3: Scan each rule block for cancer keywords and assign bucket
-        drug_cancer_buckets = {}
-        for rule in rules:
-            combined_text = "\n".join(rule['raw_paragraphs'])
+    return parsed_data
+
+def parse_drug(drug):
+    """
+    Parses one segmented drug ({'header', 'paragraphs'}) into its output entries.
+    Rules are split at Level 1 lines and each rule block is bucketed by its cancer type.
+    """
+    drug_entries = []
+    header_text = drug['header']
+    # Most headers carry no colon; only those need the regex split (lines are already stripped)
+    if ':' in header_text or '：' in header_text:
+        clean_name = _SPLIT_COLON.split(header_text, 1)[0].strip()
+    else:
+        clean_name = header_text
+    
+    rules = []
+    current_rule = None
+    current_visual_prefix = ""
+    
+    # Single pass per line: style it, attach it to its Level 1 rule, and collect the rule's cancer hits.
+    # Keywords never span a newline, so scanning line by line finds the same hits as scanning the joined block.
+    for text in drug['paragraphs']:
+        level = _line_level(text)
+        # Marked lines set the quote depth; plain lines inherit the current one
+        if level:
+            current_visual_prefix, line_prefix, line_suffix = _LINE_STYLE[level]
+        else:
+            line_prefix, line_suffix = current_visual_prefix, ""
+        if level == 1 or current_rule is None:
+            if current_rule:
+                rules.append(current_rule)
+            current_rule = {'lines': [], 'cancers': set()}
+        # Lines are kept as (prefix, text, suffix); the markdown is only assembled at flush time
+        current_rule['lines'].append((line_prefix, text, line_suffix))
+        current_rule['cancers'].update(standard_type for _, standard_type in CANCER_AUTOMATON.iter(text))
             
-            matched_cancers = set()
-            for keyword, standard_type in CANCER_MAPPING.items():
-                if keyword in combined_text:
-                    matched_cancers.add(standard_type)
-                    
-            # Rule classification: Unique match -> standard cancer, otherwise -> '通則'
-            if len(matched_cancers) == 1:
-                rule_cancer = list(matched_cancers)[0]
-            else:
-                rule_cancer = '通則'
+    if current_rule:
+        rules.append(current_rule)
+        
+    # Step 3: Assign each rule block to a bucket by the cancer types it mentions
+    drug_cancer_buckets = {}
+    for rule in rules:
+        matched_cancers = rule['cancers']
                 
-            if rule_cancer not in drug_cancer_buckets:
-                drug_cancer_buckets[rule_cancer] = []
-            drug_cancer_buckets[rule_cancer].extend(rule['paragraphs'])
+        # Rule classification: Unique match -> standard cancer, otherwise -> '通則'
+        if len(matched_cancers) == 1:
+            rule_cancer = list(matched_cancers)[0]
+        else:
+            rule_cancer = '通則'
             
-        flush_drug_data(parsed_data, clean_name, drug_cancer_buckets, header_text)
+        drug_cancer_buckets.setdefault(rule_cancer, []).extend(rule['lines'])
         
-    return parsed_data
+    flush_drug_data(drug_entries, clean_name, drug_cancer_buckets, header_text)
+    return drug_entries
 
 def flush_drug_data(parsed_data, drug_name, buckets, full_header=""):
     """
     Helper to finalize a drug's data and append to the list.
+    Each bucket holds (prefix, text, suffix) line tuples, joined into markdown here.
     We ensure '通則' comes first if present.
     """
     if not buckets:
@@ -218,12 +245,12 @@ def flush_drug_data(parsed_data, drug_name, buckets, full_header=""):
     
     for c_type in cancer_types:
         lines = buckets[c_type]
-        full_text = "\n\n".join(lines).strip() # Multi-line join
+        full_text = "\n\n".join(prefix + text + suffix for prefix, text, suffix in lines).strip() # Multi-line join
         
         # Date extraction
-        date_matches = re.findall(r'(\d{2,3})/(\d{1,2})/(\d{1,2})', full_text)
+        date_matches = _DATE_RE.findall(full_text)
         if not date_matches:
-            header_dates = re.findall(r'(\d{2,3})/(\d{1,2})/(\d{1,2})', full_header)
+            header_dates = _DATE_RE.findall(full_header)
             if len(header_dates) == 1:
                 date_matches = header_dates
         latest_date = None
@@ -247,6 +274,19 @@ def flush_drug_data(parsed_data, drug_name, buckets, full_header=""):
             "latest_date": latest_date
         })
 
+def content_hash(file_path):
+    """
+    Hashes the DOCX bytes together with this module's source and the python-docx
+    version (paragraph text comes from its CT_P.text), so a cached result is reused
+    only for the same input parsed by the same converter.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(docx.__version__.encode())
+    for path in (file_path, __file__):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
 def main():
     input_file = 'regulations.docx' # Or whatever default
     output_file = 'nhi_data.json'
@@ -258,14 +298,38 @@ def main():
         # We will try to find it in the current directory.
         pass
 
+    cache_path = None
+    if os.path.exists(input_file):
+        cache_path = os.path.join(CACHE_DIR, f"{content_hash(input_file)}.json")
+        if os.path.exists(cache_path):
+            shutil.copyfile(cache_path, output_file)
+            print(f"{input_file} unchanged since last conversion, reused {cache_path}")
+            print(f"Saved to {output_file}")
+            return
+
     print(f"Reading {input_file} w/ Strict Hierarchy Parser...")
     final_data = parse_docx(input_file)
     print(f"Extracted {len(final_data)} entries.")
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, ensure_ascii=False, indent=2)
+    # Serialize once; the same bytes go to the output and, if applicable, the cache
+    payload = orjson.dumps(final_data, option=orjson.OPT_INDENT_2)
+    with open(output_file, 'wb') as f:
+        f.write(payload)
     
     print(f"Saved to {output_file}")
 
+    # Only cache real conversions; an unreadable file yields no entries
+    if cache_path and final_data:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Write beside the target and rename, so an interrupted run never leaves a truncated cache hit
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
 if __name__ == "__main__":
     main()